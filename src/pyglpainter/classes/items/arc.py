@@ -18,9 +18,10 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import cmath
 import math
 import numpy as np
-from OpenGL.GL import GL_TRIANGLE_FAN, GL_LINE_STRIP
+from OpenGL.GL import GL_TRIANGLE_FAN, GL_LINE_STRIP, GL_LINE_LOOP
 
 from .item import Item
 
@@ -42,9 +43,11 @@ class Arc(Item):
     To simply draw a circle, use the more convenient Circle class instead.
     """
 
+    arc_tolerance = 0.004  # maximum deviation of segments from the arc
+
     def __init__(self, label, prog_id, start, end, offset, radius,
                  is_clockwise_arc, use_triangles, filled, origin=(0, 0, 0),
-                 scale=1, linewidth=1, color=(1, .5, 1, 1)):
+                 scale=1, linewidth=1, color=(1, .5, 1, 1), positions=None):
         """
         @param label
         A string containing a unique name for this item.
@@ -90,37 +93,74 @@ class Arc(Item):
 
         @param color
         Color of this item.
+
+        @param positions
+        Optional. The result of a previous `render()` call for the same
+        arc. If given, the arc is not rendered again.
         """
 
-        positions = self.render(list(start), end, offset,
-                                radius, 0, 1, 2, is_clockwise_arc)
-        vertex_count = len(positions) + 1
+        if positions is None:
+            positions = self.render(start, end, offset,
+                                    radius, 0, 1, 2, is_clockwise_arc)
 
         if use_triangles:
             primitive_type = GL_TRIANGLE_FAN
+            center = np.add(start, offset)
+            positions = np.vstack((center, positions), dtype=np.float32)
+        elif tuple(start) == tuple(end):
+            # Full circle: the last position repeats the first one. Let
+            # OpenGL close the loop instead.
+            primitive_type = GL_LINE_LOOP
+            positions = positions[:-1]
         else:
             primitive_type = GL_LINE_STRIP
 
+        vertex_count = len(positions)
+
         super(Arc, self).__init__(label, prog_id, primitive_type,
                                   linewidth, origin, scale, filled,
                                   vertex_count)
 
-        if use_triangles:
-            center = np.add(start, offset)
-            self.append_vertices([[center, color]])
-
-        for pos in positions:
-            self.append_vertices([[pos, color]])
+        self.append_vertices_bulk(positions, color)
 
         self.upload()
 
-    def render(self, position, target, offset, radius, axis_0, axis_1,
+    @staticmethod
+    def segment_count(angular_travel, radius):
+        """
+        Returns the number of line segments needed to approximate an arc
+        within `Arc.arc_tolerance`.
+
+        @param angular_travel
+        The angle spanned by the arc in radians. Its sign is ignored.
+
+        @param radius
+        The radius of the arc.
+        """
+        arc_tolerance = Arc.arc_tolerance
+
+        # A chord deviates from the arc by at most arc_tolerance if its half
+        # length does not exceed sqrt(tol * (2r - tol)). Since the curvature
+        # of a circular arc is constant, adaptive subdivision would arrive
+        # at the same uniform segment length, so compute the count directly.
+        return math.floor(
+            math.fabs(0.5 * angular_travel * radius) /
+            math.sqrt(arc_tolerance * (2 * radius - arc_tolerance))
+        )
+
+    @staticmethod
+    def render(position, target, offset, radius, axis_0, axis_1,
                axis_linear, is_clockwise_arc):
         """
         This function is a direct port of Grbl's C code into Python
         (motion_control.c) with slight refactoring for Python by Michael
         Franzl.  This function is copyright (c) Sungeun K. Jeon under GNU
         General Public License 3
+
+        `position`, `target` and `offset` are sequences of 3 coordinates
+        and are not modified. Returns the positions along the arc,
+        including `position` and `target`, as a float32 ndarray of
+        shape (n, 3).
         """
 
         center_axis0 = position[axis_0] + offset[axis_0]
@@ -132,46 +172,50 @@ class Arc(Item):
         rt_axis0 = target[axis_0] - center_axis0
         rt_axis1 = target[axis_1] - center_axis1
 
-        angular_travel = math.atan2(
-            r_axis0 * rt_axis1 - r_axis1 * rt_axis0, r_axis0 * rt_axis0 +
-            r_axis1 * rt_axis1)
-
-        arc_tolerance = 0.004
         arc_angular_travel_epsilon = 0.0000005
 
-        if is_clockwise_arc:  # Correct atan2 output per direction
-            if angular_travel >= -arc_angular_travel_epsilon:
-                angular_travel -= 2*math.pi
+        if (position[axis_0] == target[axis_0] and
+                position[axis_1] == target[axis_1]):
+            # full circle, which is what the corrections below yield too
+            angular_travel = -math.tau if is_clockwise_arc else math.tau
         else:
-            if angular_travel <= arc_angular_travel_epsilon:
-                angular_travel += 2*math.pi
+            angular_travel = math.atan2(
+                r_axis0 * rt_axis1 - r_axis1 * rt_axis0, r_axis0 * rt_axis0 +
+                r_axis1 * rt_axis1)
 
-        segments = math.floor(
-            math.fabs(0.5 * angular_travel * radius) /
-            math.sqrt(arc_tolerance * (2 * radius - arc_tolerance))
-        )
+            if is_clockwise_arc:  # Correct atan2 output per direction
+                if angular_travel >= -arc_angular_travel_epsilon:
+                    angular_travel -= math.tau
+            else:
+                if angular_travel <= arc_angular_travel_epsilon:
+                    angular_travel += math.tau
+
+        segments = Arc.segment_count(angular_travel, radius)
 
-        positions = []
-        positions.append(tuple(position))
+        positions = np.empty((max(segments, 1) + 1, 3), dtype=np.float32)
+        positions[0] = position
 
         if segments:
             theta_per_segment = angular_travel / segments
             linear_per_segment = (
                 target[axis_linear] - position[axis_linear]) / segments
 
-            for i in range(1, segments):
-                cos_Ti = math.cos(i * theta_per_segment)
-                sin_Ti = math.sin(i * theta_per_segment)
-                r_axis0 = -offset[axis_0] * cos_Ti + offset[axis_1] * sin_Ti
-                r_axis1 = -offset[axis_0] * sin_Ti - offset[axis_1] * cos_Ti
+            # all intermediate segments at once
+            i = np.arange(1, segments)
 
-                position[axis_0] = center_axis0 + r_axis0
-                position[axis_1] = center_axis1 + r_axis1
-                position[axis_linear] += linear_per_segment
+            # Rotate the radius vector as a complex number. Like Grbl, only
+            # the rotation per segment is evaluated with sin and cos; the
+            # others follow by repeated multiplication. In double precision
+            # the accumulated drift stays far below arc_tolerance.
+            rotation = np.full(segments - 1, cmath.rect(1, theta_per_segment))
+            r = complex(r_axis0, r_axis1) * np.cumprod(rotation)
 
-                positions.append(tuple(position))
+            positions[1:-1, axis_0] = center_axis0 + r.real
+            positions[1:-1, axis_1] = center_axis1 + r.imag
+            positions[1:-1, axis_linear] = position[axis_linear] + \
+                i * linear_per_segment
 
         # make sure we arrive at target
-        positions.append(tuple(target))
+        positions[-1] = target
 
         return positions
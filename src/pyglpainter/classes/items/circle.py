@@ -18,14 +18,25 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import math
+from collections import OrderedDict
+
+import numpy as np
+
 from .arc import Arc
 
 
 class Circle(Arc):
     """
     Draws a circle.
+
+    Circles with the same number of line segments share the same unit
+    circle positions, which are cached and only scaled by the radius.
     """
 
+    unit_circles = OrderedDict()  # number of segments -> positions
+    unit_circles_size = 64
+
     def __init__(self, label, prog_id, radius, use_triangles, filled,
                  origin=(0, 0, 0), scale=1, linewidth=1, color=(1, .5, .5, 1)):
         """
@@ -63,6 +74,53 @@ class Circle(Arc):
         end = start
         offset = (radius, 0, 0)
 
+        positions = Circle.render_circle(radius)
+
         super(Circle, self).__init__(label, prog_id, start, end, offset,
                                      radius, True, use_triangles, filled,
-                                     origin, scale, linewidth, color)
+                                     origin, scale, linewidth, color,
+                                     positions)
+
+    @staticmethod
+    def render_circle(radius):
+        """
+        Returns the same positions as `Arc.render()` for a clockwise circle
+        starting at (-radius, 0, 0) and centered at the local origin.
+
+        @param radius
+        The radius of the circle in local units.
+        """
+        segments = Arc.segment_count(math.tau, radius)
+        return Circle.unit_circle(segments) * radius
+
+    @staticmethod
+    def unit_circle(segments):
+        """
+        Returns the positions of a clockwise unit circle starting at
+        (-1, 0, 0), approximated by `segments` line segments. The result is
+        cached; the least recently used segment count is evicted when the
+        cache is full.
+
+        @param segments
+        The number of line segments.
+        """
+        cache = Circle.unit_circles
+
+        if segments in cache:
+            cache.move_to_end(segments)
+            return cache[segments]
+
+        n = max(segments, 1)
+        angles = math.pi - np.arange(n + 1) * (math.tau / n)
+
+        positions = np.zeros((n + 1, 3), dtype=np.float32)
+        positions[:, 0] = np.cos(angles)
+        positions[:, 1] = np.sin(angles)
+        positions[-1] = positions[0]  # close exactly
+        positions.flags.writeable = False  # shared between instances
+
+        cache[segments] = positions
+        if len(cache) > Circle.unit_circles_size:
+            cache.popitem(last=False)
+
+        return positions
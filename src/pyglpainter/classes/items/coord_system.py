@@ -18,6 +18,7 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import numpy as np
 from OpenGL.GL import (GL_LINES)
 
 from .item import Item
@@ -29,6 +30,9 @@ class CoordSystem(Item):
     and Z as blue. Length of axes is 1.
     """
 
+    highlight_color = np.array((1, 1, 1, 1), dtype=np.float32)
+    normal_color = np.array((0, 0, 0, 1), dtype=np.float32)
+
     def __init__(self, label, prog_id, origin=(0, 0, 0), scale=10,
                  linewidth=1):
         """
@@ -53,12 +57,17 @@ class CoordSystem(Item):
                                           linewidth, origin, scale, False,
                                           vertex_count)
 
-        self.append_vertices([[(0, 0, 0), (.6, .0, .0, 1.0)]])
-        self.append_vertices([[(1, 0, 0), (.6, .0, .0, 1.0)]])
-        self.append_vertices([[(0, 0, 0), (.0, .6, .0, 1.0)]])
-        self.append_vertices([[(0, 1, 0), (.0, .6, .0, 1.0)]])
-        self.append_vertices([[(0, 0, 0), (.0, .0, .6, 1.0)]])
-        self.append_vertices([[(0, 0, 1), (.0, .0, .6, 1.0)]])
+        positions = [
+            (0, 0, 0), (1, 0, 0),
+            (0, 0, 0), (0, 1, 0),
+            (0, 0, 0), (0, 0, 1),
+        ]
+        colors = [
+            (.6, .0, .0, 1.0), (.6, .0, .0, 1.0),
+            (.0, .6, .0, 1.0), (.0, .6, .0, 1.0),
+            (.0, .0, .6, 1.0), (.0, .0, .6, 1.0),
+        ]
+        self.append_vertices_bulk(positions, colors)
 
         self.upload()
 
@@ -72,13 +81,13 @@ class CoordSystem(Item):
         True or False
         """
 
-        for x in range(0, 3):
-            if val is True:
-                newcol = (1, 1, 1, 1)
-            else:
-                newcol = (0, 0, 0, 1)
+        if val is True:
+            newcol = CoordSystem.highlight_color
+        else:
+            newcol = CoordSystem.normal_color
 
-            self.vdata_pos_col["color"][x * 2] = newcol
+        # the origin vertex of each axis
+        self.vdata_pos_col["color"][0:6:2] = newcol
 
         self.upload()
         self.dirty = True
@@ -19,8 +19,7 @@ along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import numpy as np
-from OpenGL.GL import (glBindBuffer, glBufferSubData, GL_LINE_STRIP,
-                       GL_ARRAY_BUFFER)
+from OpenGL.GL import GL_LINE_STRIP
 
 from gcode_machine import GcodeMachine
 from .item import Item
@@ -36,6 +35,8 @@ class GcodePath(Item):
     modes are drawn with different colors for better visualization.
     """
 
+    highlight_color = np.array((1, 0.5, 1, 1), dtype=np.float32)
+
     def __init__(self, label, prog_id, gcode_list, cmpos, ccs, cs_offsets,
                  do_fractionize_arcs=True):
         """
@@ -120,26 +121,27 @@ class GcodePath(Item):
         pass
 
     def draw(self, mat_v_inverted):
-        for line_number in self._lines_to_highlight:
-            if 2 * line_number > self.vertexcount:
-                continue
+        if self._lines_to_highlight:
+            self._substitute_highlights()
 
-            # Substitute color of highlighted lines directly in the GPU.
-            stride = self.vdata_pos_col.strides[0]
-            position_size = self.vdata_pos_col.dtype["position"].itemsize
-            color_size = self.vdata_pos_col.dtype["color"].itemsize
+        super(GcodePath, self).draw(mat_v_inverted)
 
-            # 2 opengl segments for each logical line, see below
-            offset = 2 * line_number * stride + position_size
+    def _substitute_highlights(self):
+        """
+        Substitute the color of lines remembered by `highlight_line()`
+        directly in the GPU.
 
-            col = np.array([1, 0.5, 1, 1], dtype=np.float32)
+        Consecutive lines are merged into runs, and each run is uploaded
+        with a single `glBufferSubData` call, see `upload_vertices()`.
+        """
+        lines, self._lines_to_highlight = self._lines_to_highlight, []
 
-            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_array)
-            glBufferSubData(GL_ARRAY_BUFFER, offset, color_size, col)
+        # 2 opengl segments for each logical line, see render()
+        indices = 2 * np.unique(lines)
+        indices = indices[(indices >= 0) & (indices < self.vertexcount)]
 
-        del self._lines_to_highlight[:]
-
-        super(GcodePath, self).draw(mat_v_inverted)
+        self.vdata_pos_col["color"][indices] = GcodePath.highlight_color
+        self.upload_vertices(indices, 2)
 
     def render(self):
         """
@@ -154,28 +156,41 @@ class GcodePath(Item):
         Gcode processor to break arcs down into lines.
         """
 
-        colors = {
-            0: (.5, .5, .5),
-            1: (.7, .7, 1),
-            2: (.8, .7, 1),
-            3: (.7, .8, 1),
-            None: (0, 0, 0),
-        }
-        col = colors[0]  # initial color
+        # motion mode -> color, the last row is used for an unknown mode
+        colors = np.array([
+            (.5, .5, .5),
+            (.7, .7, 1),
+            (.8, .7, 1),
+            (.7, .8, 1),
+            (0, 0, 0),
+        ])
+
+        count = len(self.gcode)
 
-        # create vertex at start of path
-        self.append_vertices(
-            [[self.machine.position_m, (col[0], col[1], col[2], 1)]])
+        # First pass: run the state machine and record its state per line.
+        positions = np.empty((count, 3))
+        targets = np.empty((count, 3))
+        motion_modes = np.empty(count, dtype=np.int8)
+        spindle_speeds = np.empty(count)  # NaN when not set
+        in_arc = np.zeros(count, dtype=bool)
+        arc_counts = np.zeros(count, dtype=np.int32)
+        arcs_by_sim = np.zeros(count, dtype=bool)
+
+        start_position = self.machine.position_m
 
         arc_mode = False
         arc_by_sim = False
         arc_count = 0
 
-        for line in self.gcode:
+        for i, line in enumerate(self.gcode):
             self.machine.set_line(line)
             self.machine.parse_state()
 
-            if "arc_begin[G02" in line:
+            # All arc markers contain "arc_". Most lines don't, so they are
+            # scanned only once.
+            if "arc_" not in line:
+                pass
+            elif "arc_begin[G02" in line:
                 arc_mode = 2
 
                 if "_sim" in line:
@@ -194,39 +209,48 @@ class GcodePath(Item):
                 motion_mode = self.machine.current_motion_mode
             else:
                 motion_mode = arc_mode
+                in_arc[i] = True
+                arc_counts[i] = arc_count
+                arcs_by_sim[i] = arc_by_sim
 
-            col = colors[motion_mode]
+            motion_modes[i] = 4 if motion_mode is None else motion_mode
 
             ss = self.machine.current_spindle_speed
+            spindle_speeds[i] = np.nan if ss is None else ss
 
-            if arc_mode is False:
-                color1 = (col[0], col[1], col[2], 1)
-
-                if ss is None:
-                    color2 = (col[0], col[1], col[2], 0.3)
-                else:
-                    color2 = (ss/255, ss/255, ss/255, 1)
-
-            else:
-                if arc_count % 2 == 0:
-                    color1 = (col[0], col[1], col[2], 0.8)
-                else:
-                    color1 = (col[0], col[1], col[2], 1)
-
-                if arc_by_sim is True:
-                    color2 = color1  # continuous arc
-                else:
-                    color2 = (col[0], col[1], col[2], 0.5)
-
-            if ss is not None:
-                color2 = (ss/255, ss/255, ss/255, 1)
-
-            # draw two gl line segments per gcode line for better visualization
-            # of commands
-            diff = np.subtract(self.machine.target_m, self.machine.position_m)
-
-            self.append_vertices(
-                [[self.machine.position_m + diff * 0.001, color1]])
-            self.append_vertices([[self.machine.target_m, color2]])
+            positions[i] = self.machine.position_m
+            targets[i] = self.machine.target_m
 
             self.machine.done()
+
+        # Second pass: compute all vertices at once.
+        col = colors[motion_modes]
+
+        color1 = np.ones((count, 4))
+        color1[:, 0:3] = col
+        color1[in_arc & (arc_counts % 2 == 0), 3] = 0.8
+
+        color2 = np.empty((count, 4))
+        color2[:, 0:3] = col
+        color2[:, 3] = np.where(in_arc, 0.5, 0.3)
+        continuous = arcs_by_sim & in_arc  # continuous arc
+        color2[continuous] = color1[continuous]
+
+        has_ss = ~np.isnan(spindle_speeds)
+        color2[has_ss, 0:3] = spindle_speeds[has_ss, np.newaxis] / 255
+        color2[has_ss, 3] = 1
+
+        # draw two gl line segments per gcode line for better visualization
+        # of commands
+        vertex_positions = np.empty((2 * count + 1, 3))
+        vertex_positions[0] = start_position
+        vertex_positions[1::2] = positions + (targets - positions) * 0.001
+        vertex_positions[2::2] = targets
+
+        vertex_colors = np.empty((2 * count + 1, 4))
+        vertex_colors[0, 0:3] = colors[0]  # initial color
+        vertex_colors[0, 3] = 1
+        vertex_colors[1::2] = color1
+        vertex_colors[2::2] = color2
+
+        self.append_vertices_bulk(vertex_positions, vertex_colors)
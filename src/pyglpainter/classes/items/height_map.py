@@ -18,6 +18,8 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+from collections import OrderedDict
+
 import OpenGL
 from OpenGL.GL import (GL_TRIANGLE_STRIP)
 
@@ -31,6 +33,9 @@ class HeightMap(Item):
     WIP
     """
 
+    indices_cache = OrderedDict()  # (nodes_x, nodes_y) -> indices
+    indices_cache_size = 16
+
     def __init__(self, label, prog,
                  nodes_x, nodes_y, pos_col, fill,
                  origin=(0, 0, 0), scale=1, linewidth=1, color=(1, 1, 1, 0.2)):
@@ -69,13 +74,10 @@ class HeightMap(Item):
         self.set_data(pos_col)
 
     def set_data(self, pos_col):
-        height_max_idx = pos_col["position"].argmax(axis=0)[2]
-        height_min_idx = pos_col["position"].argmin(axis=0)[2]
-        height_max = pos_col["position"][height_max_idx][2]
-        height_min = pos_col["position"][height_min_idx][2]
+        heights = pos_col["position"][:, 2]
         self.uniforms = {
-            "height_max": [height_max],
-            "height_min": [height_min],
+            "height_max": [heights.max()],
+            "height_min": [heights.min()],
         }
 
         self.vdata_pos_col = pos_col
@@ -85,41 +87,50 @@ class HeightMap(Item):
         super(HeightMap, self).draw(mat_v_inverted)
 
     def calculate_indices(self):
+        """
+        Returns the indices of a single triangle strip covering the grid.
+
+        The strip runs back and forth (serpentine), row by row. Each row
+        consists of 2 * (nodes_x - 1) alternating indices of its upper and
+        lower nodes, followed by a degenerate triangle to turn around.
+
+        The indices only depend on the grid size. They are cached and
+        shared between HeightMaps of the same size; the least recently
+        used grid size is evicted when the cache is full.
+        """
         nx = self.nodes_x
         ny = self.nodes_y
 
+        cache = HeightMap.indices_cache
+        key = (nx, ny)
+
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
         size = 1 + 2 * (nx - 1) * (ny - 1) + 2 * (ny - 1)
         vdata_indices = np.zeros(size, dtype=OpenGL.constants.GLuint)
 
-        j = 1  # start with one, first index always zero
-        d = 1  # right direction
-
-        for y in range(0, ny - 1):
-
-            if d == 1:
-                r = range(0, nx - 1)
-            else:
-                r = range(nx - 1, 0, -1)
-
-            for x in r:
-                vdata_indices[j] = (y + 1) * nx + x
-                j += 1
-                vdata_indices[j] = y * nx + x + d
-                j += 1
-
-            if d == 1:
-                # make a degenerate triangle to finish this row
-                vdata_indices[j] = (y + 2) * nx - 1
-                j += 1
-                vdata_indices[j] = (y + 2) * nx - 1
-                j += 1
-            else:
-                # make a degenerate triangle to finish this row
-                vdata_indices[j] = (y + 1) * nx
-                j += 1
-                vdata_indices[j] = (y + 1) * nx
-                j += 1
-
-            d *= -1
+        # first index always zero
+        rows = vdata_indices[1:].reshape(ny - 1, 2 * nx)
+
+        y = np.arange(ny - 1)[:, np.newaxis]
+        backwards = y % 2 == 1  # every other row runs right to left
+
+        x = np.arange(nx - 1)
+        x = np.where(backwards, nx - 1 - x, x)
+        d = np.where(backwards, -1, 1)
+
+        rows[:, 0:-2:2] = (y + 1) * nx + x
+        rows[:, 1:-2:2] = y * nx + x + d
+
+        # make a degenerate triangle to finish each row
+        rows[:, -2:] = np.where(backwards, (y + 1) * nx, (y + 2) * nx - 1)
+
+        vdata_indices.flags.writeable = False  # shared between instances
+
+        cache[key] = vdata_indices
+        if len(cache) > HeightMap.indices_cache_size:
+            cache.popitem(last=False)
 
         return vdata_indices
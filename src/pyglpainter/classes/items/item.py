@@ -21,6 +21,7 @@ along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 
 import numpy as np
 import ctypes
+import logging
 import math
 
 from PyQt6.QtGui import (QMatrix4x4, QVector3D, QVector4D)
@@ -36,6 +37,8 @@ from OpenGL.GL import (glBindVertexArray, glBindBuffer,
                        GL_STATIC_DRAW, GL_FRONT_AND_BACK, GL_LINE, GL_FILL,
                        GL_UNSIGNED_INT)
 
+logger = logging.getLogger(__name__)
+
 
 class Item():
     """
@@ -65,6 +68,17 @@ class Item():
     in this directory which inherit from it).
     """
 
+    # TODO: Support not only for attributes "color" and "position", but
+    # arbitrary formats.
+    vertex_format = np.dtype([
+        ("position", np.float32, 3),
+        ("color", np.float32, 4)
+    ])
+    # byte layout of one vertex in vdata_pos_col and on the GPU
+    vertex_stride = vertex_format.itemsize
+    position_size = vertex_format["position"].itemsize
+    color_size = vertex_format["color"].itemsize
+
     def __init__(self, label, program, primitive_type=GL_LINES, linewidth=1,
                  origin=(0, 0, 0), scale=1, filled=False, vertexcount_max=0):
         """
@@ -101,9 +115,12 @@ class Item():
         # generate attribute state label aka VAO
         self.vao = glGenVertexArrays(1)
 
-        # generate data buffer labels aka VBO
-        self.vbo_array = glGenBuffers(1)  # this buffer labels positions+colors
-        self.vbo_element_array = glGenBuffers(1)  # VertexBuffer ID for indices
+        # generate data buffer labels aka VBO, both in one call
+        vbo_array, vbo_element_array = glGenBuffers(2)
+        self.vbo_array = int(vbo_array)  # this buffer labels positions+colors
+        self.vbo_element_array = int(vbo_element_array)  # ID for indices
+        self._vbo_array_nbytes = 0  # size of GPU storage for self.vbo_array
+        self._uploaded_indices = None  # vdata_indices last sent to the GPU
 
         self.program = program
         self.label = label
@@ -129,18 +146,15 @@ class Item():
         self.rotation_angle = 0
         self.rotation_vector = QVector3D(0, 1, 0)  # default rotation around Y
 
+        # cached Model matrix, see model_matrix_list()
+        self._mat_m_key = None
+        self._mat_m_list = None
+
         self.dirty = True
 
         self.uniforms = {}
 
-        # TODO: Support not only for attributes "color" and "position", but
-        # arbitrary formats.
-        supported_vertex_format = [
-            ("position", np.float32, 3),
-            ("color", np.float32, 4)
-        ]
-        self.vdata_pos_col = np.zeros(
-            self.vertexcount_max, supported_vertex_format)
+        self.vdata_pos_col = np.zeros(self.vertexcount_max, Item.vertex_format)
 
         if "vdata_indices" not in list(vars(self).keys()):
             self.vdata_indices = None
@@ -151,7 +165,7 @@ class Item():
         pass
 
     def setup_vao(self, locations):
-        stride = self.vdata_pos_col.strides[0]
+        stride = Item.vertex_stride
 
         glBindVertexArray(self.vao)
 
@@ -164,8 +178,7 @@ class Item():
                               GL_FALSE, stride, offset_pos)
 
         if "color" in locations["attributes"]:
-            offset_col = ctypes.c_void_p(
-                self.vdata_pos_col.dtype["position"].itemsize)
+            offset_col = ctypes.c_void_p(Item.position_size)
             loc_col = locations["attributes"]["color"]
             glEnableVertexAttribArray(loc_col)
             glVertexAttribPointer(loc_col, 4, GL_FLOAT,
@@ -187,19 +200,46 @@ class Item():
         @param vertexdata
         A Python list. Each list element is a list `[position, color]`
         where `position` is a 3-tuple and `color` is a 4-tuple.
+        Alternatively, a NumPy structured array with the fields "position"
+        and "color".
 
         """
-        length_to_append = len(vertexdata)
+        if isinstance(vertexdata, np.ndarray):
+            positions = vertexdata["position"]
+            colors = vertexdata["color"]
+        else:
+            positions = [vertex[0] for vertex in vertexdata]
+            colors = [vertex[1] for vertex in vertexdata]
+
+        if len(positions) > 0:
+            self.append_vertices_bulk(positions, colors)
 
+    def append_vertices_bulk(self, positions, colors):
+        """
+        Like `append_vertices()`, but appends all vertices with one NumPy
+        assignment per attribute instead of one Python iteration per vertex.
+
+        @param positions
+        An array-like of shape (n, 3).
+
+        @param colors
+        An array-like of shape (n, 4), or a single 4-tuple which is then
+        used for all n vertices.
+        """
+        length_to_append = len(positions)
+        self._check_vertexcount(length_to_append)
+
+        start = self.vertexcount
+        end = start + length_to_append
+        self.vdata_pos_col["position"][start:end] = positions
+        self.vdata_pos_col["color"][start:end] = colors
+        self.vertexcount = end
+
+    def _check_vertexcount(self, length_to_append):
         if self.vertexcount + length_to_append > self.vertexcount_max:
             raise IndexError("Item '{}': You are trying to append more vertices for item than the maximum of {}. Use set_vertexcount_max to increase the maximum possible vertices.".format(
                 self.label, self.vertexcount_max))
 
-        for vertex in vertexdata:
-            self.vdata_pos_col["position"][self.vertexcount] = vertex[0]
-            self.vdata_pos_col["color"][self.vertexcount] = vertex[1]
-            self.vertexcount += 1
-
     def set_vertexcount_max(self, new_count):
         """
         Increase the CPU data buffer size to a value larger than the one
@@ -210,11 +250,11 @@ class Item():
         """
 
         if new_count > self.vertexcount_max:
+            vdata_pos_col = np.empty(new_count, Item.vertex_format)
+            vdata_pos_col[:self.vertexcount_max] = self.vdata_pos_col
+            vdata_pos_col[self.vertexcount_max:] = 0
+            self.vdata_pos_col = vdata_pos_col
             self.vertexcount_max = new_count
-            extension = np.zeros(
-                new_count,
-                [("position", np.float32, 3), ("color", np.float32, 4)])
-            self.vdata_pos_col = np.append(self.vdata_pos_col, extension)
         else:
             raise BufferError("Item '{}': You are trying to set a vertex count lower than has been reserved during initialization. This isn't yet supported. User a lower count during initialization instead.".format(
                 self.label, self.vertexcount_max))
@@ -226,47 +266,109 @@ class Item():
         re-uploading everything. Use this funtion to modify data
         directly in the GPU.
 
+        The CPU data is modified too, so a later `upload()` keeps the
+        substitution.
+
         @param vertex_nr
         Number of vertex to substitute.
 
         @param pos
-        3-tuple of floats. Position to substitue for specified vertex.
+        3-tuple of floats or array-like. Position to substitue for specified
+        vertex.
 
         @params col
-        4-tuple of RGBA color. Color to substitute for specified vertex.
+        4-tuple of RGBA color or array-like. Color to substitute for
+        specified vertex.
         """
 
-        if vertex_nr > self.vertexcount:
+        if not 0 <= vertex_nr < self.vertexcount:
             return
 
-        stride = self.vdata_pos_col.strides[0]
-        position_size = self.vdata_pos_col.dtype["position"].itemsize
-        color_size = self.vdata_pos_col.dtype["color"].itemsize
+        vertex = self.vdata_pos_col[vertex_nr:vertex_nr + 1]
+        vertex["position"] = pos
+        vertex["color"] = col
 
+        # position and color are adjacent, replace both in one go
         glBindBuffer(GL_ARRAY_BUFFER, self.vbo_array)
+        glBufferSubData(GL_ARRAY_BUFFER, vertex_nr * Item.vertex_stride,
+                        Item.vertex_stride, vertex)
 
-        # replace position
-        position = np.array([pos[0], pos[1], pos[2]], dtype=np.float32)
-        offset = vertex_nr * stride
-        glBufferSubData(GL_ARRAY_BUFFER, offset, position_size, position)
+    def substitute_many(self, vertex_nrs, positions, colors):
+        """
+        Like `substitute()`, but for many vertices at once. Vertices with
+        consecutive numbers are uploaded to the GPU in a single call.
 
-        # replace color
-        color = np.array([col[0], col[1], col[2], col[3]], dtype=np.float32)
-        offset = vertex_nr * stride + position_size
-        glBufferSubData(GL_ARRAY_BUFFER, offset, color_size, color)
+        @param vertex_nrs
+        Sequence of numbers of the vertices to substitute.
 
-    def remove(self):
+        @param positions
+        Array-like of shape (n, 3), or a single 3-tuple used for all
+        vertices.
+
+        @param colors
+        Array-like of shape (n, 4), or a single 4-tuple used for all
+        vertices.
         """
-        Removes self. The object will disappear from the world.
+        vertex_nrs = np.asarray(vertex_nrs, dtype=np.intp)
+
+        if len(vertex_nrs) == 0:
+            return
+
+        positions = np.asarray(positions, dtype=np.float32)
+        colors = np.asarray(colors, dtype=np.float32)
+
+        valid = (vertex_nrs >= 0) & (vertex_nrs < self.vertexcount)
+        if positions.ndim == 2:
+            positions = positions[valid]
+        if colors.ndim == 2:
+            colors = colors[valid]
+        vertex_nrs = vertex_nrs[valid]
+
+        self.vdata_pos_col["position"][vertex_nrs] = positions
+        self.vdata_pos_col["color"][vertex_nrs] = colors
+
+        self.upload_vertices(vertex_nrs)
+
+    def upload_vertices(self, vertex_nrs, max_step=1):
         """
-        glDeleteBuffers(1, [self.vbo_array])
+        Uploads the CPU data of some vertices to the GPU, for example after
+        modifying `vdata_pos_col` in place.
 
-        if self.vdata_indices is not None:
-            glDeleteBuffers(1, [self.vbo_element_array])
+        The vertex numbers are sorted and split into runs, and each run is
+        uploaded with a single `glBufferSubData` call. Vertices between two
+        listed vertices of a run are uploaded too.
+
+        @param vertex_nrs
+        Sequence of numbers of the vertices to upload.
 
+        @param max_step
+        Largest difference between consecutive vertex numbers within one
+        run. 1 uploads only contiguous runs.
+        """
+        vertex_nrs = np.unique(vertex_nrs)
+
+        if len(vertex_nrs) == 0:
+            return
+
+        stride = Item.vertex_stride
+        breaks = np.flatnonzero(np.diff(vertex_nrs) > max_step) + 1
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_array)
+        for run in np.split(vertex_nrs, breaks):
+            first = int(run[0])
+            last = int(run[-1]) + 1
+            glBufferSubData(GL_ARRAY_BUFFER, first * stride,
+                            (last - first) * stride,
+                            self.vdata_pos_col[first:last])
+
+    def remove(self):
+        """
+        Removes self. The object will disappear from the world.
+        """
+        glDeleteBuffers(2, [self.vbo_array, self.vbo_element_array])
         glDeleteVertexArrays(1, [self.vao])
         self.dirty = True
-        print("Item {}: removing myself.".format(self.label))
+        logger.debug("Item %s: removing myself.", self.label)
 
     def upload(self):
         """
@@ -276,18 +378,29 @@ class Item():
         `append_vertices()`. Note that uploading a large set of data
         is an expensive operation. To modify data, call `substitute()`
         instead.
+
+        When called again with an unchanged `vertexcount_max`, the existing
+        GPU storage is overwritten instead of being reallocated.
         """
         glBindVertexArray(self.vao)
 
         glBindBuffer(GL_ARRAY_BUFFER, self.vbo_array)
-        # TODO: make STATIC/DYNAMIC drawing configurable
-        glBufferData(GL_ARRAY_BUFFER, self.vdata_pos_col.nbytes,
-                     self.vdata_pos_col, GL_DYNAMIC_DRAW)
-
-        if self.vdata_indices is not None:
-            # indexes never change and are static
+        nbytes = self.vdata_pos_col.nbytes
+        if nbytes == self._vbo_array_nbytes:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, nbytes, self.vdata_pos_col)
+        else:
+            # TODO: make STATIC/DYNAMIC drawing configurable
+            glBufferData(GL_ARRAY_BUFFER, nbytes,
+                         self.vdata_pos_col, GL_DYNAMIC_DRAW)
+            self._vbo_array_nbytes = nbytes
+
+        if (self.vdata_indices is not None and
+                self.vdata_indices is not self._uploaded_indices):
+            # indexes never change and are static, so they are uploaded
+            # only once, or again when a new index array has been assigned
             glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.vdata_indices.nbytes,
                          self.vdata_indices, GL_STATIC_DRAW)
+            self._uploaded_indices = self.vdata_indices
 
         glBindVertexArray(0)
 
@@ -320,8 +433,7 @@ class Item():
         Mandatory only when self.billboard == True
         """
 
-        mat_m = self.calculate_model_matrix(mat_v_inverted)
-        mat_m = Item.qt_mat_to_list(mat_m)
+        mat_m = self.model_matrix_list(mat_v_inverted)
         self.program.set_uniform("mat_m", mat_m)
 
         for key, val in self.uniforms.items():
@@ -330,16 +442,21 @@ class Item():
                     "Shader does not know about uniform {}".format(key))
             self.program.set_uniform(key, val)
 
-        if self.filled:
-            glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
-        else:
-            glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
+        # set up state, unless the previously drawn item of the same
+        # program already did, see `Program.items_draw()`
+        state = (self.filled, self.linewidth)
+        if state != self.program.draw_state:
+            if self.filled:
+                glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
+            else:
+                glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
+
+            glLineWidth(self.linewidth)
+            self.program.draw_state = state
 
-        # set up state
         glBindVertexArray(self.vao)
 
         # draw!
-        glLineWidth(self.linewidth)
 
         if self.vdata_indices is not None:
             # indexed drawing
@@ -348,10 +465,38 @@ class Item():
         else:
             glDrawArrays(self.primitive_type, 0, self.vertexcount)
 
-        glBindVertexArray(0)
+        # The VAO stays bound. The next item binds its own, and the caller
+        # unbinds once after the last one, see `Program.items_draw()`.
 
         self.dirty = False
 
+    def model_matrix_list(self, viewmatrix_inv=None):
+        """
+        Returns the result of `calculate_model_matrix()` as an array
+        suitable to upload into the GPU, see `qt_mat_to_list()`.
+
+        Unless self.billboard == True, the Model matrix only depends on
+        self.origin, self.scale and the rotation, so it is recalculated
+        only when one of them has changed.
+
+        @param viewmatrix_inv
+        See `calculate_model_matrix()`.
+        """
+        if self.billboard:
+            return Item.qt_mat_to_list(
+                self.calculate_model_matrix(viewmatrix_inv))
+
+        key = (self.origin.x(), self.origin.y(), self.origin.z(),
+               self.scale, self.rotation_angle, self.rotation_vector.x(),
+               self.rotation_vector.y(), self.rotation_vector.z())
+
+        if key != self._mat_m_key:
+            self._mat_m_list = Item.qt_mat_to_list(
+                self.calculate_model_matrix())
+            self._mat_m_key = key
+
+        return self._mat_m_list
+
     def calculate_model_matrix(self, viewmatrix_inv=None):
         """
         Calculates the Model matrix based upon self.origin and self.scale.
@@ -463,20 +608,35 @@ class Item():
             QVector3D.dotProduct(v1, v2) / (v1.length() * v2.length())
         )
 
+    @staticmethod
+    def angles_between(v1, v2):
+        """
+        Like `angle_between()`, but for many pairs of vectors at once.
+        Returns a NumPy array of angles in radians.
+
+        @param v1
+        Array-like of shape (n, 3)
+
+        @param v2
+        Array-like of shape (n, 3)
+        """
+        v1 = np.asarray(v1, dtype=np.float64)
+        v2 = np.asarray(v2, dtype=np.float64)
+
+        cos = np.einsum("ij,ij->i", v1, v2) / (
+            np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1))
+
+        # rounding may push parallel vectors slightly out of range
+        return np.arccos(np.clip(cos, -1, 1))
+
     @staticmethod
     def qt_mat_to_list(mat):
         """
-        Transforms a QMatrix4x4 into a one-dimensional Python list
-        in row-major order, suitable to upload into the GPU.
+        Transforms a QMatrix4x4 into a one-dimensional float32 NumPy array
+        in row-major order, suitable to upload into the GPU without
+        conversion.
 
         @param mat
         Matrix of type QMatrix4x4
         """
-        arr = [0] * 16
-
-        for i in range(4):
-            for j in range(4):
-                idx = 4 * i + j
-                arr[idx] = mat[i, j]
-
-        return arr
+        return np.array(mat.copyDataTo(), dtype=np.float32)
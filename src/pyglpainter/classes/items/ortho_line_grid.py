@@ -18,6 +18,7 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import numpy as np
 from OpenGL.GL import (GL_LINES)
 
 from .item import Item
@@ -75,12 +76,16 @@ class OrthoLineGrid(Item):
                                             linewidth, origin, scale, False,
                                             vertex_count)
 
-        for wu in range(0, width_units):
-            x = unit * wu
-            self.append_vertices([[(x, 0, 0), color]])
-            self.append_vertices([[(x, height, 0), color]])
+        positions = np.zeros((vertex_count, 3))
 
-        for hu in range(0, height_units):
-            y = unit * hu
-            self.append_vertices([[(0, y, 0), color]])
-            self.append_vertices([[(width, y, 0), color]])
+        # vertical lines, from y = 0 to y = height
+        vertical = positions[:2 * width_units]
+        vertical[:, 0] = np.repeat(unit * np.arange(width_units), 2)
+        vertical[1::2, 1] = height
+
+        # horizontal lines, from x = 0 to x = width
+        horizontal = positions[2 * width_units:]
+        horizontal[:, 1] = np.repeat(unit * np.arange(height_units), 2)
+        horizontal[1::2, 0] = width
+
+        self.append_vertices_bulk(positions, color)
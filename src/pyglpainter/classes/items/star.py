@@ -18,6 +18,7 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import numpy as np
 from OpenGL.GL import GL_LINES
 
 from .item import Item
@@ -29,6 +30,14 @@ class Star(Item):
     appears as a star when viewed from a non-orthogonal direction.
     """
 
+    # the same for all stars, origin and scale are applied by the GPU
+    positions = np.array([
+        (-.5, 0, 0), (1, 0, 0),
+        (0, -.5, 0), (0, .5, 0),
+        (0, 0, -.5), (0, 0, .5),
+    ], dtype=np.float32)
+    positions.flags.writeable = False
+
     def __init__(self, label, prog_id, origin=(0, 0, 0), scale=1, linewidth=1,
                  color=(1, 1, .5, 1)):
         """
@@ -53,16 +62,11 @@ class Star(Item):
         @param color
         Color of this item.
         """
-        vertex_count = 6
+        vertex_count = len(Star.positions)
         super(Star, self).__init__(label, prog_id, GL_LINES,
                                    linewidth, origin, scale, False,
                                    vertex_count)
 
-        self.append_vertices([[(-.5, 0, 0), color]])
-        self.append_vertices([[(1, 0, 0), color]])
-        self.append_vertices([[(0, -.5, 0), color]])
-        self.append_vertices([[(0, .5, 0), color]])
-        self.append_vertices([[(0, 0, -.5), color]])
-        self.append_vertices([[(0, 0, .5), color]])
+        self.append_vertices_bulk(Star.positions, color)
 
         self.upload()
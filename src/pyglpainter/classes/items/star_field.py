@@ -0,0 +1,84 @@
+"""
+pyglpainter - Minimalistic, modern OpenGL drawing for technical applications
+Copyright (C) 2015 Michael Franzl
+
+This file is part of pyglpainter.
+
+pyglpainter is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyglpainter is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import numpy as np
+from OpenGL.GL import GL_LINES
+
+from .item import Item
+from .star import Star
+
+
+class StarField(Item):
+    """
+    Draws many stars (see Star) as a single item.
+
+    Unlike individual Star items, which each need their own buffers, model
+    matrix and draw call, all stars are placed and scaled once on the CPU
+    and drawn with a single draw call. Individual stars can't be moved
+    afterwards; move the whole field with `set_origin()` instead.
+    """
+
+    def __init__(self, label, prog_id, origins, scales=1, origin=(0, 0, 0),
+                 scale=1, linewidth=1, color=(1, 1, .5, 1)):
+        """
+        @param label
+        A string containing a unique name for this item.
+
+        @param prog_id
+        OpenGL program ID (determines shaders to use) to use for this item.
+
+        @param origins
+        Origins of the stars in local coordinates. A sequence of
+        3-tuples or an array of shape (n, 3).
+
+        @param scales
+        Scales of the stars. A single number for all stars, or a
+        sequence with one number per star.
+
+        @param origin
+        Origin of this item in world space.
+
+        @param scale
+        Scale of this item in world space.
+
+        @param linewidth
+        Width of rendered lines in pixels.
+
+        @param color
+        Color of this item.
+        """
+        origins = np.asarray(origins, dtype=np.float32).reshape(-1, 3)
+        scales = np.broadcast_to(
+            np.asarray(scales, dtype=np.float32), len(origins))
+
+        # (stars, star vertices, xyz)
+        positions = origins[:, np.newaxis] + \
+            scales[:, np.newaxis, np.newaxis] * Star.positions
+
+        positions = positions.reshape(-1, 3)
+
+        super(StarField, self).__init__(label, prog_id, GL_LINES,
+                                        linewidth, origin, scale, False,
+                                        len(positions))
+
+        self.append_vertices_bulk(positions, color)
+
+        self.upload()
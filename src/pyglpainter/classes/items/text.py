@@ -18,18 +18,35 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+from collections import OrderedDict
+
+import numpy as np
 from OpenGL.GL import GL_TRIANGLES
 
 from .item import Item
 from .fonts import font_dutch_blunt as font
 
+# x, y coordinates of all glyph vertices, see layout()
+font_vertices = np.array(font.vdata).reshape(-1, 2)
+
+# character code -> first vertex, number of vertices and width of a glyph
+glyph_offsets = np.array(font.vdataoffsets)
+glyph_sizes = np.array(font.sizes)
+glyph_widths = np.array(font.widths)
+
 
 class Text(Item):
     """
     Renders vector text with a triangle-only font. See font_dutch_blunt.py
     for more information.
+
+    Texts which have been rendered before, e.g. repeated labels, share the
+    same cached vertex positions.
     """
 
+    layouts = OrderedDict()  # text -> positions
+    layouts_size = 256
+
     def __init__(self, label, prog_id, text, origin=(0, 0, 0), scale=1,
                  linewidth=1, color=(1, 1, 1, 0.5)):
         """
@@ -55,24 +72,67 @@ class Text(Item):
         Color of this item.
         """
 
-        # calculate the number of needed vertices
-        vertexcount_total = 0
-
-        for char in text:
-            j = ord(char)
-            vertexcount_total += font.sizes[j]
+        # the number of needed vertices
+        vertexcount_total = len(Text.layout(text))
 
         super(Text, self).__init__(label, prog_id, GL_TRIANGLES,
                                    linewidth, origin, scale, True,
                                    vertexcount_total)
 
+        self.text = text
+        self.color = color
+
         self.render(text, color)
         self.upload()
 
+    def set_text(self, text, color=None):
+        """
+        Replaces the rendered text, e.g. of a live-updating label.
+
+        Nothing is done if text and color are unchanged. If the new text
+        has as many vertices as the old one, only the vertices which
+        differ are uploaded to the GPU, see `upload_vertices()`.
+
+        @param text
+        Text to be rendered. An ASCII string.
+
+        @param color
+        Color of the text. Defaults to the current color.
+        """
+        if color is None:
+            color = self.color
+
+        if text == self.text and np.array_equal(color, self.color):
+            return
+
+        count = len(Text.layout(text))
+
+        if count == self.vertexcount:
+            old = self.vdata_pos_col[:count].copy()
+
+            self.vertexcount = 0
+            self.render(text, color)
+
+            new = self.vdata_pos_col[:count]
+            changed = np.flatnonzero(
+                (new["position"] != old["position"]).any(axis=1) |
+                (new["color"] != old["color"]).any(axis=1))
+
+            self.upload_vertices(changed)
+        else:
+            if count > self.vertexcount_max:
+                self.set_vertexcount_max(count)
+
+            self.vertexcount = 0
+            self.render(text, color)
+            self.upload()
+
+        self.text = text
+        self.color = color
+
     def render(self, text, color):
         """
-        Reads vertex coordinates and appends vertices with a simple
-        typesetting algorithm.
+        Appends the vertices of a text, see `layout()`.
 
         @param text
         Text to be rendered. An 8-bit ASCII string.
@@ -80,32 +140,71 @@ class Text(Item):
         @param color
         Color of the text.
         """
+        self.append_vertices_bulk(Text.layout(text), color)
+
+    @staticmethod
+    def layout(text):
+        """
+        Reads vertex coordinates and returns the vertex positions of a text
+        with a simple typesetting algorithm. The result is cached; the least
+        recently used text is evicted when the cache is full.
+
+        @param text
+        Text to be rendered. An ASCII string, other characters are
+        rendered as "?".
+        """
+        cache = Text.layouts
+
+        if text in cache:
+            cache.move_to_end(text)
+            return cache[text]
 
-        letterpos = 0
         letterspacing = 0.5
-        linepos = 0
         linespacing = 6
 
-        for char in text:
-            j = ord(char)
+        codes = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8)
+        newline = codes == ord("\n")
+
+        sizes = np.where(newline, 0, glyph_sizes[codes])
+        drawn = sizes > 0
+
+        # glyphs without vertices advance by the width of the last drawn one
+        last = np.maximum.accumulate(
+            np.where(drawn, np.arange(len(codes)), -1))
+        widths = np.where(last >= 0, glyph_widths[codes[last]], 0)
+
+        linepos = -linespacing * np.cumsum(newline)
+
+        # Each glyph advances by its width, then by the letter spacing.
+        # Accumulate both in this order for every line, starting at 0.
+        letterpos = np.zeros(len(codes))
+        starts = np.concatenate(([0], np.flatnonzero(newline) + 1))
+        ends = np.append(np.flatnonzero(newline), len(codes))
+
+        for start, end in zip(starts, ends):
+            steps = np.empty(2 * (end - start))
+            steps[0::2] = widths[start:end]
+            steps[1::2] = letterspacing
+            letterpos[start + 1:end] = np.cumsum(steps)[1:-1:2]
 
-            if char == "\n":
-                # start a new line
-                linepos -= linespacing
-                letterpos = 0
+        # copy the vertices of all drawn glyphs and move them into place
+        counts = sizes[drawn]
+        first = np.cumsum(counts) - counts
+        count = counts.sum()
+        index = np.arange(count) + np.repeat(
+            glyph_offsets[codes[drawn]] - first, counts)
 
-                continue
+        positions = np.zeros((count, 3))
+        positions[:, 0] = font_vertices[index, 0] + \
+            np.repeat(letterpos[drawn], counts)
+        positions[:, 1] = font_vertices[index, 1] + \
+            np.repeat(linepos[drawn], counts)
 
-            vertexcount = font.sizes[j] * 2
-            offset = font.vdataoffsets[j] * 2
+        positions = positions.astype(np.float32)
+        positions.flags.writeable = False  # shared between instances
 
-            for i in range(offset, offset + vertexcount, 2):
-                x = font.vdata[i]
-                y = font.vdata[i + 1]
-                w = font.widths[j]
-                x += letterpos
-                y += linepos
-                self.append_vertices([[(x, y, 0), color]])
+        cache[text] = positions
+        if len(cache) > Text.layouts_size:
+            cache.popitem(last=False)
 
-            letterpos += w
-            letterpos += letterspacing
+        return positions
@@ -26,17 +26,21 @@ from OpenGL.GL import (glGetString, glEnable, glBlendFunc, glHint,
                        GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_LINE_SMOOTH,
                        GL_LINE_SMOOTH_HINT, GL_DONT_CARE, GL_COLOR_BUFFER_BIT,
                        GL_DEPTH_BUFFER_BIT)
+import logging
 import math
 import re
+import numpy as np
 
-from PyQt6.QtGui import QMatrix4x4, QVector3D, QVector4D, QQuaternion
+from PyQt6.QtGui import QMatrix4x4, QVector3D, QQuaternion
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 import OpenGL
 OpenGL.ERROR_CHECKING = False
 OpenGL.FULL_LOGGING = False
 
+logger = logging.getLogger(__name__)
+
 
 class PainterWidget(QOpenGLWidget):
     """
@@ -105,6 +109,14 @@ class PainterWidget(QOpenGLWidget):
     * Support of more OpenGL features (textures, lights, etc.)
     """
 
+    trackball_radius = 0.8  # the radius of the virtual trackball
+
+    # transition radius delimiting sphere and hyperbola,
+    # see _find_trackball_vector()
+    trackball_r_transition = math.sqrt(trackball_radius**2 / 2)
+
+    _repaint_requested = pyqtSignal()  # see dirty
+
     def __init__(self, parent=None, refresh_rate=20):
         super().__init__(parent)
 
@@ -118,23 +130,46 @@ class PainterWidget(QOpenGLWidget):
         self.cam_look = QVector3D()  # the current camera look direction
         self.cam_pos = QVector3D()  # the current camera position
 
+        # camera state the View matrix was last calculated for
+        self._view_key = None
+        self._mat_v_list = None
+
+        # projection state the Projection matrix was last calculated for
+        self._projection_key = None
+        self._mat_p_list = None
+
+        # program label -> (program, mat_v list, mat_p list) last uploaded
+        self._uploaded_matrices = {}
+
         self.fov = 90  # the current field of view for the projection matrix
 
         # The width and height of the window. resizeGL() will set them.
         self.width = None
         self.height = None
 
-        # Rather than repainting the scene on each mouse event,
-        # we repaint at fixed timer intervals.
-        self.dirty = True
+        self._refresh_rate = refresh_rate
 
-        # Setup our only and main timer
+        # Rather than repainting the scene on each mouse event, setting
+        # `dirty` starts a single-shot timer which repaints the scene once
+        # `refresh_rate` milliseconds later. The timer only runs while a
+        # repaint is pending, so an idle widget causes no wakeups.
         self._timer = QTimer()
+        self._timer.setSingleShot(True)
         self._timer.timeout.connect(self._timer_timeout)
 
+        # `dirty` may be set from other threads, but the timer must be
+        # started in the thread of this widget. The signal is queued then.
+        self._repaint_requested.connect(self._repaint_schedule)
+
+        self._dirty = False
+        self.dirty = True
+
         # contains OpenGL "programs" of different shaders
         self.programs = {}
 
+        # compiled shaders shared between programs, see Shader.create()
+        self._shaders = {}
+
         # Setup inital world Rotation states
         self._rotation_quat = QQuaternion()  # to rotate the View matrix
         self._rotation_quat_start = None  # state for mouse click
@@ -147,18 +182,18 @@ class PainterWidget(QOpenGLWidget):
 
         self._mouse_fov_start = None  # state for mouse click
 
-        self._refresh_rate = refresh_rate
-
     def initializeGL(self):
         """
         This function is called once on application startup. See Qt Docs.
         """
-        # output some useful information
-        # print("OPENGL EXTENSIONS", glGetString(GL_EXTENSIONS))
-        # print("OPENGL VERSION", glGetString(GL_VERSION))
-        # print("OPENGL VENDOR", glGetString(GL_VENDOR))
-        # print("OPENGL RENDERER", glGetString(GL_RENDERER))
-        # print("OPENGL GLSL VERSION", glGetString(GL_SHADING_LANGUAGE_VERSION))
+        # output some useful information, only queried when it is logged
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("OPENGL EXTENSIONS %s", glGetString(GL_EXTENSIONS))
+            logger.debug("OPENGL VERSION %s", glGetString(GL_VERSION))
+            logger.debug("OPENGL VENDOR %s", glGetString(GL_VENDOR))
+            logger.debug("OPENGL RENDERER %s", glGetString(GL_RENDERER))
+            logger.debug("OPENGL GLSL VERSION %s",
+                         glGetString(GL_SHADING_LANGUAGE_VERSION))
 
         # some global OpenGL settings
         glEnable(GL_DEPTH_TEST)
@@ -174,10 +209,6 @@ class PainterWidget(QOpenGLWidget):
         # the world background color
         glClearColor(0, 0, 0, 1.0)
 
-        # fire the timer every so many milliseconds, this determines the frames
-        # per second this will re-draw the scene if self.dirty is True
-        self._timer.start(self._refresh_rate)
-
     def program_create(self, label, vertex_filepath, fragment_filepath,
                        shader_opts):
         """
@@ -196,7 +227,8 @@ class PainterWidget(QOpenGLWidget):
         A string containing the absolute filepath of the GLSL fragment shader
         source code.
         """
-        prog = Program(label, vertex_filepath, fragment_filepath, shader_opts)
+        prog = Program(label, vertex_filepath, fragment_filepath, shader_opts,
+                       self._shaders)
         self.programs[label] = prog
 
         return prog
@@ -231,16 +263,14 @@ class PainterWidget(QOpenGLWidget):
         @param label_regexp
         A regular expression to match.
         """
-        program_labels = list(self.programs.keys())
+        pattern = re.compile(label_regexp)
 
-        for program_label in program_labels:
-            item_labels = list(self.programs[program_label].items.keys())
+        for prog in self.programs.values():
+            # collect first, the dict can't change size while iterating
+            matches = [label for label in prog.items if pattern.match(label)]
 
-            for item_label in item_labels:
-                if re.match(label_regexp, item_label):
-                    item = self.programs[program_label].items[item_label]
-                    item.remove()
-                    del self.programs[program_label].items[item_label]
+            for item_label in matches:
+                prog.items.pop(item_label).remove()
 
     def paintGL(self):
         """ This function is automatically called by the Qt libraries
@@ -265,6 +295,60 @@ class PainterWidget(QOpenGLWidget):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
         # ======= VIEW MATRIX BEGIN ==========
+        # only recalculated when the camera has moved
+        q = self._rotation_quat
+        t = self._translation_vec
+        view_key = (q.scalar(), q.x(), q.y(), q.z(), t.x(), t.y(), t.z())
+
+        if view_key != self._view_key:
+            self._update_view_matrix()
+            self._view_key = view_key
+
+        mat_v_list = self._mat_v_list
+        # ======= VIEW MATRIX END ==========
+
+        # ======= PROJECTION MATRIX BEGIN ==========
+        # only recalculated when the field of view or window has changed
+        projection_key = (self.fov, self.aspect)
+
+        if projection_key != self._projection_key:
+            self.mat_p = QMatrix4x4()  # start with an empty matrix
+            self.mat_p.perspective(self.fov, self.aspect, 0.1, 100000)
+            self._mat_p_list = PainterWidget.qt_mat_to_list(self.mat_p)
+            self._projection_key = projection_key
+
+        mat_p_list = self._mat_p_list
+        # ======= PROJECTION MATRIX END ==========
+
+        # loop over all programs/shaders
+        # first switch to that program (expensive operation)
+        # then draw all items belonging to that program
+
+        for key, prog in self.programs.items():
+            if prog.items:
+                glUseProgram(prog.id)
+
+                # uniforms are program state, upload only when changed.
+                # The matrix lists are only replaced when recalculated.
+                uploaded = self._uploaded_matrices.get(key)
+                if (uploaded is None or uploaded[0] is not prog or
+                        uploaded[1] is not mat_v_list or
+                        uploaded[2] is not mat_p_list):
+                    prog.set_uniform("mat_v", mat_v_list)  # set view matrix
+                    prog.set_uniform("mat_p", mat_p_list)  # set projection
+                    self._uploaded_matrices[key] = (prog, mat_v_list,
+                                                    mat_p_list)
+
+                prog.items_draw(self.mat_v_inverted)
+
+        # nothing more to do here!
+        # Swapping the OpenGL buffer is done automatically by Qt.
+
+    def _update_view_matrix(self):
+        """
+        Calculates the View matrix, its inverse and the camera vectors
+        from the current camera rotation and translation.
+        """
         # start with an empty matrix
         self.mat_v = QMatrix4x4()
 
@@ -277,59 +361,38 @@ class PainterWidget(QOpenGLWidget):
         # calculate inverse view matrix which contains
         # camera right, up, look directions, and camera position
         # Items in "billboard" mode will need this to know where the camera is
-        self.mat_v_inverted = self.mat_v.inverted()[0]
+        # The View matrix is a rigid transformation, so rather than doing a
+        # general inversion, undo translation and rotation in reverse order.
+        self.mat_v_inverted = QMatrix4x4()
+        self.mat_v_inverted.translate(-self._translation_vec)
+        self.mat_v_inverted.rotate(self._rotation_quat.inverted())
 
         # the right direction of the camera
         # extract 1st column
-        cam_right = self.mat_v_inverted * QVector4D(1, 0, 0, 0)
-        self.cam_right = QVector3D(cam_right[0], cam_right[1], cam_right[2])
+        self.cam_right = self.mat_v_inverted.column(0).toVector3D()
 
         # the up direction of the camera
         # extract 2nd column
-        cam_up = self.mat_v_inverted * QVector4D(0, 1, 0, 0)
-        self.cam_up = QVector3D(cam_up[0], cam_up[1], cam_up[2])
+        self.cam_up = self.mat_v_inverted.column(1).toVector3D()
 
         # the look direction of the camera
         # extract 3rd column
-        cam_look = self.mat_v_inverted * QVector4D(0, 0, 1, 0)
-        self.cam_look = QVector3D(cam_look[0], cam_look[1], cam_look[2])
+        self.cam_look = self.mat_v_inverted.column(2).toVector3D()
 
         # the position of the camera
         # extract 4th column
-        cam_pos = self.mat_v_inverted * QVector4D(0, 0, 0, 1)
-        self.cam_pos = QVector3D(cam_pos[0], cam_pos[1], cam_pos[2])
+        self.cam_pos = self.mat_v_inverted.column(3).toVector3D()
 
-        # upload the View matrix into the GPU,
+        # will be uploaded into the GPU,
         # accessible to the vertex shader under the variable name "mat_v"
-        mat_v_list = PainterWidget.qt_mat_to_list(self.mat_v)
-        # ======= VIEW MATRIX END ==========
-
-        # ======= PROJECTION MATRIX BEGIN ==========
-        self.mat_p = QMatrix4x4()  # start with an empty matrix
-        self.mat_p.perspective(self.fov, self.aspect, 0.1, 100000)
-        mat_p_list = PainterWidget.qt_mat_to_list(self.mat_p)
-        # ======= PROJECTION MATRIX END ==========
-
-        # loop over all programs/shaders
-        # first switch to that program (expensive operation)
-        # then draw all items belonging to that program
-
-        for key, prog in self.programs.items():
-            if len(list(prog.items.keys())) > 0:
-                glUseProgram(prog.id)
-                prog.set_uniform("mat_v", mat_v_list)  # set view matrix
-                prog.set_uniform("mat_p", mat_p_list)  # set projection matrix
-                prog.items_draw(self.mat_v_inverted)
-
-        # nothing more to do here!
-        # Swapping the OpenGL buffer is done automatically by Qt.
+        self._mat_v_list = PainterWidget.qt_mat_to_list(self.mat_v)
 
     def resizeGL(self, width, height):
         """ Called by the Qt libraries whenever the window is resized
         """
         self.width = width
         self.height = height
-        self.aspect = width / height
+        self.aspect = width / max(height, 1)  # height is 0 when minimized
         glViewport(0, 0, width, height)
 
     def mousePressEvent(self, event):
@@ -368,7 +431,7 @@ class PainterWidget(QOpenGLWidget):
         delta = event.angleDelta().y()
 
         # move in look direction of camera
-        self._translation_vec += self.cam_look * delta / 15
+        self._translation_vec += self.cam_look * (delta / 15)
 
         # re-paint at the next timer tick
         self.dirty = True
@@ -397,10 +460,13 @@ class PainterWidget(QOpenGLWidget):
             mouse_rotation_current_vec = self._find_trackball_vector(x, y)
 
             # get the angle between the vector which was stored at the
-            # time of mouse click and the current vector
-            angle_between = PainterWidget.angle_between(
+            # time of mouse click and the current vector. Both are
+            # normalized, so their dot product is the cosine of the angle.
+            # Rounding can push it slightly beyond 1 for tiny movements.
+            cos_angle = QVector3D.dotProduct(
                 mouse_rotation_current_vec,
                 self._mouse_rotation_start_vec)
+            angle_between = math.acos(max(-1.0, min(1.0, cos_angle)))
 
             angle_between *= 20  # arbitrary amplification for faster rotation
 
@@ -426,13 +492,13 @@ class PainterWidget(QOpenGLWidget):
             diff_y = diff[1]
 
             self._translation_vec = self._translation_vec_start - \
-                self.cam_right * diff_x * 2 + self.cam_up * diff_y * 2
+                self.cam_right * (diff_x * 2) + self.cam_up * (diff_y * 2)
 
         elif btns & Qt.MouseButton.RightButton:
             # Translation forward/backward depending on camera orientation
             diff_y = y - self._mouse_camforward_start
             self._translation_vec = self._translation_vec_start - \
-                self.cam_look * diff_y * 2
+                self.cam_look * (diff_y * 2)
 
         # re-draw at next timer tick
         self.dirty = True
@@ -458,7 +524,7 @@ class PainterWidget(QOpenGLWidget):
         x = px / (self.width / 2) - 1
         y = 1 - py / (self.height / 2)
 
-        r = 0.8  # the radius of the virtual trackball
+        r = PainterWidget.trackball_radius
 
         """
         definition of trackball sphere:
@@ -481,19 +547,19 @@ class PainterWidget(QOpenGLWidget):
         """
 
         # hypotenuse of x and y coordinates
-        hypotenuse = math.sqrt(x**2 + y**2)
+        hypotenuse = math.hypot(x, y)
 
         # transition radius delimiting sphere and hyperbola, from (6)
-        r_transition = math.sqrt(r**2 / 2)
+        r_transition = PainterWidget.trackball_r_transition
 
         if hypotenuse < r_transition:
             # mouse is within sphere radius
             # get z on surface of sphere
-            z = math.sqrt(r**2 - (x**2 + y**2))
+            z = math.sqrt(r**2 - hypotenuse**2)
         else:
             # mouse is outside sphere
             # get z on surface of hyperbola
-            z = r**2 / (2 * math.sqrt(x**2 + y**2))
+            z = r**2 / (2 * hypotenuse)
 
         # vector from center of sphere to whatever surface has been selected
         vec = QVector3D(x, y, z)
@@ -501,9 +567,34 @@ class PainterWidget(QOpenGLWidget):
 
         return vec
 
+    @property
+    def dirty(self):
+        """
+        True if the scene has to be repainted. Setting this to True
+        schedules a repaint, see `_repaint_schedule()`.
+        """
+        return self._dirty
+
+    @dirty.setter
+    def dirty(self, value):
+        was_dirty = self._dirty
+        self._dirty = value
+
+        if value and not was_dirty:
+            self._repaint_requested.emit()
+
+    def _repaint_schedule(self):
+        """
+        Starts the repaint timer unless it is already running. Repeated
+        requests don't restart it, so continuous mouse movement still
+        repaints every `refresh_rate` milliseconds.
+        """
+        if not self._timer.isActive():
+            self._timer.start(self._refresh_rate)
+
     def _timer_timeout(self):
         """
-        called regularly from timer
+        called from the single-shot timer when a repaint is pending
         """
 
         if self.dirty:
@@ -529,17 +620,10 @@ class PainterWidget(QOpenGLWidget):
     @staticmethod
     def qt_mat_to_list(mat):
         """
-        Transforms a QMatrix4x4 into a one-dimensional Python list
-        in row-major order.
+        Transforms a QMatrix4x4 into a one-dimensional float32 NumPy array
+        in row-major order, which OpenGL can read without conversion.
 
         @param mat
         Matrix of type QMatrix4x4
         """
-        arr = [0] * 16
-
-        for i in range(4):
-            for j in range(4):
-                idx = 4 * i + j
-                arr[idx] = mat[i, j]
-
-        return arr
+        return np.array(mat.copyDataTo(), dtype=np.float32)
@@ -18,17 +18,16 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
-import sys
-
 from OpenGL.GL import (glCreateProgram, glLinkProgram, glAttachShader,
                        glGetProgramiv, glDetachShader, glUniformMatrix4fv,
                        glUniform1f, glGetUniformLocation, glGetAttribLocation,
-                       GL_LINK_STATUS, GL_FRAGMENT_SHADER, GL_VERTEX_SHADER,
-                       GL_TRUE)
+                       glBindVertexArray, GL_LINK_STATUS, GL_FRAGMENT_SHADER,
+                       GL_VERTEX_SHADER, GL_TRUE)
 from .items.item import Item
 from .items.coord_system import CoordSystem
 from .items.ortho_line_grid import OrthoLineGrid
 from .items.star import Star
+from .items.star_field import StarField
 from .items.text import Text
 from .items.arc import Arc
 from .items.circle import Circle
@@ -43,10 +42,21 @@ class Program():
     This class represents an OpenGL program.
     """
 
-    def __init__(self, label, vertex_filepath, fragment_filepath, shader_opts):
+    # class name -> item class, see item_create(). Subclasses of Item
+    # defined elsewhere can be registered here, too.
+    item_classes = {klss.__name__: klss for klss in (
+        Item, CoordSystem, OrthoLineGrid, Star, StarField, Text, Arc,
+        Circle, GcodePath, HeightMap)}
+
+    def __init__(self, label, vertex_filepath, fragment_filepath, shader_opts,
+                 shader_cache=None):
         """
         Create a named OpenGL program, attach shaders to it, and remember.
 
+        The shaders are only compiled and linked once the first item is
+        created for this program, see compile(). Programs which are never
+        used don't cost any startup time.
+
         @param label
         A string containing a unique label for the program that can be
         passed into the item_create() function call, which tells the Item
@@ -59,28 +69,21 @@ class Program():
         @param fragment_filepath
         A string containing the absolute filepath of the GLSL fragment shader
         source code.
+
+        @param shader_cache
+        Optional dict in which compiled shaders are shared with other
+        programs of the same OpenGL context, see Shader.create().
         """
-        self.id = glCreateProgram()
+        self.id = None  # set by compile()
         self.label = label
-        self.shader_vertex = Shader(GL_VERTEX_SHADER, vertex_filepath)
-        self.shader_fragment = Shader(GL_FRAGMENT_SHADER, fragment_filepath)
-
-        self.shader_opts = shader_opts
+        self.vertex_filepath = vertex_filepath
+        self.fragment_filepath = fragment_filepath
+        self.shader_cache = shader_cache
 
-        glAttachShader(self.id, self.shader_vertex.id)
-        glAttachShader(self.id, self.shader_fragment.id)
+        self.shader_vertex = None
+        self.shader_fragment = None
 
-        # link
-        glLinkProgram(self.id)
-        link_result = glGetProgramiv(self.id, GL_LINK_STATUS)
-
-        if (link_result == 0):
-            raise RuntimeError("Error in LINKING")
-
-        # once compiled and linked, the shaders are in the GPU
-        # and can be discarded from the application context
-        glDetachShader(self.id, self.shader_vertex.id)
-        glDetachShader(self.id, self.shader_fragment.id)
+        self.shader_opts = shader_opts
 
         self.locations = {
             "uniforms": {},
@@ -92,18 +95,60 @@ class Program():
             "1f": glUniform1f,
         }
 
-        for varname, _ in shader_opts["uniforms"].items():
-            self.locations["uniforms"][varname] = glGetUniformLocation(
-                self.id, varname)
+        # uniform name -> function taking the value, see compile()
+        self.uniform_setters = {}
+
+        self.items = {}
+
+        # (filled, linewidth) set up by the last drawn item, see items_draw()
+        self.draw_state = None
+
+    def compile(self):
+        """
+        Compiles the shaders and links the program, unless this has been
+        done already. Requires a current OpenGL context.
+        """
+        if self.id is not None:
+            return
+
+        program_id = glCreateProgram()
+
+        self.shader_vertex = Shader.create(
+            GL_VERTEX_SHADER, self.vertex_filepath, self.shader_cache)
+        self.shader_fragment = Shader.create(
+            GL_FRAGMENT_SHADER, self.fragment_filepath, self.shader_cache)
+
+        glAttachShader(program_id, self.shader_vertex.id)
+        glAttachShader(program_id, self.shader_fragment.id)
 
-        for varname, _ in shader_opts["attributes"].items():
+        # link
+        glLinkProgram(program_id)
+        link_result = glGetProgramiv(program_id, GL_LINK_STATUS)
+
+        if (link_result == 0):
+            raise RuntimeError("Error in LINKING")
+
+        # once compiled and linked, the shaders are in the GPU
+        # and can be discarded from the application context
+        glDetachShader(program_id, self.shader_vertex.id)
+        glDetachShader(program_id, self.shader_fragment.id)
+
+        for varname, function_string in self.shader_opts["uniforms"].items():
+            location = glGetUniformLocation(program_id, varname)
+            self.locations["uniforms"][varname] = location
+            self.uniform_setters[varname] = self.uniform_setter(
+                function_string, location)
+
+        for varname, _ in self.shader_opts["attributes"].items():
             self.locations["attributes"][varname] = glGetAttribLocation(
-                self.id, varname)
+                program_id, varname)
 
-        self.items = {}
+        self.id = program_id
 
     def item_create(self, class_name, item_label, *args):
         if item_label not in self.items:
+            self.compile()
+
             # create
             klss = self.str_to_class(class_name)
             item = klss(item_label, self, *args)
@@ -117,26 +162,51 @@ class Program():
         return item
 
     def set_uniform(self, key, val):
-        if key in self.locations["uniforms"]:
-            function_string = self.shader_opts["uniforms"][key]
-            location = self.locations["uniforms"][key]
-            function = self.uniform_function_dispatcher[function_string]
-
-            # see https://www.opengl.org/sdk/docs/man/html/glUniform.xhtml
-
-            if "Matrix" in function_string:
-                count = 1
-                transpose = GL_TRUE
-                function(location, count, transpose, val)
-            elif "v" in function_string:
-                function(location, count, val)
-            else:
-                function(location, *val)
+        setter = self.uniform_setters.get(key)
+        if setter is not None:
+            setter(val)
+
+    def uniform_setter(self, function_string, location):
+        """
+        Returns a function which uploads a uniform value to `location`.
+        The glUniform variant and its arguments are chosen here once, so
+        that set_uniform() doesn't have to on every call.
+
+        @param function_string
+        The glUniform suffix of the uniform, a key of
+        `uniform_function_dispatcher`, e.g. "Matrix4fv".
+
+        @param location
+        The location of the uniform in this program.
+        """
+        function = self.uniform_function_dispatcher[function_string]
+
+        # see https://www.opengl.org/sdk/docs/man/html/glUniform.xhtml
+
+        if "Matrix" in function_string:
+            count = 1
+            transpose = GL_TRUE
+            return lambda val: function(location, count, transpose, val)
+        elif "v" in function_string:
+            count = 1
+            return lambda val: function(location, count, val)
+        else:
+            return lambda val: function(location, *val)
 
     def items_draw(self, mat_v_inverted):
-        for _, item in self.items.items():
+        # Consecutive items with the same polygon mode and line width skip
+        # setting them up again. Other code may change this GL state
+        # between frames, so don't trust it from the last frame.
+        self.draw_state = None
+
+        for item in self.items.values():
             item.draw(mat_v_inverted)
 
+        self.draw_state = None
+
+        # each item binds its own VAO, unbind only once all are drawn
+        glBindVertexArray(0)
+
     @staticmethod
     def str_to_class(str):
-        return getattr(sys.modules[__name__], str)
+        return Program.item_classes[str]
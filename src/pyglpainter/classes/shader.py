@@ -18,6 +18,8 @@ You should have received a copy of the GNU General Public License
 along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import os
+
 from OpenGL.GL import (glCreateShader, glShaderSource, glCompileShader,
                        glGetShaderiv, glGetShaderInfoLog, GL_COMPILE_STATUS)
 
@@ -27,6 +29,8 @@ class Shader():
     This class represents an OpenGL shader.
     """
 
+    sources = {}  # real filepath -> (modification time, source code)
+
     def __init__(self, shader_type, filepath):
         """
         Create a named OpenGL program, attach shaders to it, and remember.
@@ -35,8 +39,7 @@ class Shader():
         self.id = glCreateShader(shader_type)
 
         # set the GLSL sources
-        with open(filepath, "r") as f:
-            sourcecode = f.read()
+        sourcecode = Shader.read_source(filepath)
 
         glShaderSource(self.id, sourcecode)
 
@@ -48,3 +51,45 @@ class Shader():
         if (compile_result == 0):
             raise RuntimeError("Error in Shader: " +
                                str(glGetShaderInfoLog(self.id)))
+
+    @staticmethod
+    def create(shader_type, filepath, cache=None):
+        """
+        Returns a compiled Shader.
+
+        @param cache
+        Optional dict. Shaders of the same type and source code are only
+        compiled once and shared via this dict. Shader objects belong to
+        an OpenGL context, so don't share a cache between contexts.
+        """
+        if cache is None:
+            return Shader(shader_type, filepath)
+
+        key = (shader_type, Shader.read_source(filepath))
+
+        shader = cache.get(key)
+        if shader is None:
+            shader = Shader(shader_type, filepath)
+            cache[key] = shader
+
+        return shader
+
+    @staticmethod
+    def read_source(filepath):
+        """
+        Returns the source code of a shader file. Files are only read
+        again when they have been modified.
+        """
+        filepath = os.path.realpath(filepath)
+        mtime = os.stat(filepath).st_mtime_ns
+
+        cached = Shader.sources.get(filepath)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(filepath, "r") as f:
+            sourcecode = f.read()
+
+        Shader.sources[filepath] = (mtime, sourcecode)
+
+        return sourcecode
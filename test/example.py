@@ -21,9 +21,7 @@ along with pyglpainter. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import os
-import random
 import sys
-import math
 
 from PyQt6.QtWidgets import QApplication
 
@@ -112,12 +110,10 @@ def main():
                       "class Star", (60, 60, 60), 1, 1, (1, 1, 1, 1))
     i.billboard = True
 
-    for i in range(0, 50):
-        x = random.randint(50, 80)
-        y = random.randint(50, 80)
-        z = random.randint(50, 80)
-        s = random.randint(1, 12)
-        p.item_create("Star", "mystar%d" % i, "simple3d", (x, y, z), s)
+    # a single item with one draw call for all stars
+    origins = np.random.randint(50, 81, (50, 3))
+    scales = np.random.randint(1, 13, 50)
+    p.item_create("StarField", "mystars", "simple3d", origins, scales)
 
     # Draw a 3D circular arc, aka. Helix
     is_clockwise = True
@@ -298,15 +294,13 @@ def main():
     dat = np.zeros(grid_x * grid_y,
                    [("position", np.float32, 3), ("color", np.float32, 4)])
 
-    for y in range(0, grid_y):
-        for x in range(0, grid_x):
-            idx = y * grid_x + x
-            i = grid_x/2 - x
-            j = grid_y/2 - y
-            z = 10 * math.sin(math.sqrt(i**2 + j**2)) / \
-                (math.sqrt(i**2 + j**2) + 0.1)
-            dat["position"][idx] = (x, y, z)
-            dat["color"][idx] = (1, 1, 1, 1)
+    # the grid is laid out row by row, see HeightMap.calculate_indices()
+    y, x = np.meshgrid(np.arange(grid_y), np.arange(grid_x), indexing="ij")
+    r = np.hypot(grid_x/2 - x, grid_y/2 - y)
+    z = 10 * np.sin(r) / (r + 0.1)
+
+    dat["position"] = np.stack((x, y, z), axis=-1).reshape(-1, 3)
+    dat["color"] = (1, 1, 1, 1)
 
     i = p.item_create("HeightMap", "myheightmap", "heightmap",
                       grid_x, grid_y, dat, True, (100, 400, 1), 10)
@@ -321,7 +315,7 @@ def main():
     mygcode1.highlight_line(2)
 
     # ===== DELETE ITEMS (OPTIONAL) =====
-    # p.item_remove("mystar2")
+    # p.item_remove("mystars")
 
     sys.exit(app.exec())
 